@@ -5,35 +5,171 @@ Lab 2.8 Deliverable: Demonstrates department routing, time-based
 transfers, and context passing to transferred calls.
 """
 
+import functools
 from datetime import datetime
 from signalwire_agents import AgentBase, SwaigFunctionResult
 
+_DEPARTMENTS = {
+    "sales": {
+        "number": "+15551111111",
+        "description": "New purchases and pricing",
+        "hours": (9, 18)
+    },
+    "support": {
+        "number": "+15552222222",
+        "description": "Technical assistance",
+        "hours": (8, 20)
+    },
+    "billing": {
+        "number": "+15553333333",
+        "description": "Payments and invoices",
+        "hours": (9, 17)
+    },
+    "returns": {
+        "number": "+15554444444",
+        "description": "Returns and exchanges",
+        "hours": (10, 16)
+    }
+}
 
-class ReceptionistAgent(AgentBase):
-    """Receptionist agent with intelligent call routing."""
+# Department presentation strings are invariant, so build them once at
+# import time instead of on every agent construction / tool invocation.
+_DEPT_KEYS = tuple(_DEPARTMENTS.keys())
+_DEPT_BULLETS = tuple(
+    f"{name.title()}: {info['description']}"
+    for name, info in _DEPARTMENTS.items()
+)
+_DEPT_LIST_STRING = "Our departments: " + "; ".join(_DEPT_BULLETS)
+
+# Common spellings mapped straight to the canonical key, so resolving a
+# department name is one dict hit with no lowercased copy allocated.
+_DEPT_NAME_CANON = {
+    variant: canonical
+    for canonical in _DEPT_KEYS
+    for variant in (canonical, canonical.title(), canonical.upper())
+}
+
+# Open hours packed into one 24-bit mask per department: bit h is set when
+# the department is open during hour h, so the check is a shift and an AND.
+_OPEN_MASK = {
+    name: sum(1 << h for h in range(*info["hours"]))
+    for name, info in _DEPARTMENTS.items()
+}
+_HOURS_STR = {
+    name: f"{name.title()} is open {info['hours'][0]}:00 to {info['hours'][1]}:00"
+    for name, info in _DEPARTMENTS.items()
+}
+
+# Tool parameter schemas are invariant too; they are embedded verbatim in
+# the JSON-serialized SWML, so they stay plain dicts but are built exactly
+# once here and shared by every registration.
+_CHECK_AVAIL_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "department": {
+            "type": "string",
+            "description": "Department name"
+        }
+    },
+    "required": ["department"]
+}
 
-    DEPARTMENTS = {
-        "sales": {
-            "number": "+15551111111",
-            "description": "New purchases and pricing",
-            "hours": (9, 18)
+_TRANSFER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "department": {
+            "type": "string",
+            "enum": list(_DEPT_KEYS),
+            "description": "Department to transfer to"
+        }
+    },
+    "required": ["department"]
+}
+
+_CONTEXT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "department": {
+            "type": "string",
+            "enum": list(_DEPT_KEYS),
+            "description": "Department to transfer to"
         },
-        "support": {
-            "number": "+15552222222",
-            "description": "Technical assistance",
-            "hours": (8, 20)
+        "reason": {
+            "type": "string",
+            "description": "Reason for calling"
         },
-        "billing": {
-            "number": "+15553333333",
-            "description": "Payments and invoices",
-            "hours": (9, 17)
+        "caller_name": {
+            "type": "string",
+            "description": "Caller's name"
+        }
+    },
+    "required": ["department", "reason"]
+}
+
+_VOICEMAIL_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "department": {
+            "type": "string",
+            "description": "Department name"
         },
-        "returns": {
-            "number": "+15554444444",
-            "description": "Returns and exchanges",
-            "hours": (10, 16)
+        "message": {
+            "type": "string",
+            "description": "Message to leave"
+        },
+        "callback_number": {
+            "type": "string",
+            "description": "Number to call back"
         }
-    }
+    },
+    "required": ["department", "message"]
+}
+
+
+# Payload templates carrying the static fields; call sites merge the
+# per-call values over these so each dict starts pre-sized with its keys.
+_CONTEXT_TEMPLATE = {"from_receptionist": True}
+_VOICEMAIL_TEMPLATE = {
+    "voicemail_department": None,
+    "voicemail_message": None,
+    "voicemail_callback": None,
+    "voicemail_time": None
+}
+
+
+def _canonical_department(name: str) -> str:
+    """Resolve a department name to its canonical lowercase key."""
+    return _DEPT_NAME_CANON.get(name) or _DEPT_NAME_CANON.get(name.casefold())
+
+
+def _now_cached(raw_data: dict = None) -> datetime:
+    """Return datetime.now(), reading the clock once per SWAIG request.
+
+    The first call stashes the result on raw_data so every branch of a
+    tool invocation sees the same instant instead of re-reading the clock.
+    """
+    if raw_data is None:
+        return datetime.now()
+    now = raw_data.get("_now_cached")
+    if now is None:
+        now = raw_data["_now_cached"] = datetime.now()
+    return now
+
+
+@functools.lru_cache(maxsize=4)
+def _iso_for_second(sec: int) -> str:
+    """Format a Unix second as an ISO timestamp, cached per second.
+
+    Bursts of transfers within the same second reuse one formatted
+    string instead of paying the isoformat() conversion each time.
+    """
+    return datetime.fromtimestamp(sec).isoformat()
+
+
+class ReceptionistAgent(AgentBase):
+    """Receptionist agent with intelligent call routing."""
+
+    DEPARTMENTS = _DEPARTMENTS
 
     def __init__(self):
         super().__init__(name="receptionist")
@@ -45,10 +181,7 @@ class ReceptionistAgent(AgentBase):
 
         self.prompt_add_section(
             "Departments",
-            bullets=[
-                f"{name.title()}: {info['description']}"
-                for name, info in self.DEPARTMENTS.items()
-            ]
+            bullets=list(_DEPT_BULLETS)
         )
 
         self.prompt_add_section(
@@ -61,190 +194,148 @@ class ReceptionistAgent(AgentBase):
         )
 
         self.add_language("English", "en-US", "rime.spore")
-        self._setup_functions()
 
-    def _is_department_open(self, department: str) -> tuple:
+    def _is_department_open(self, department: str, now: datetime = None) -> tuple:
         """Check if department is open. Returns (is_open, message)."""
-        dept_info = self.DEPARTMENTS.get(department)
-        if not dept_info:
+        mask = _OPEN_MASK.get(department)
+        if mask is None:
             return False, "Unknown department"
 
-        hour = datetime.now().hour
-        start, end = dept_info["hours"]
-
-        if start <= hour < end:
+        hour = (now or datetime.now()).hour
+        if (mask >> hour) & 1:
             return True, None
-        else:
-            return False, f"{department.title()} is open {start}:00 to {end}:00"
+        return False, _HOURS_STR[department]
 
-    def _setup_functions(self):
-        """Define routing and transfer functions."""
+    @AgentBase.tool(
+        name="list_departments",
+        description="List all available departments"
+    )
+    def list_departments(self) -> SwaigFunctionResult:
+        return SwaigFunctionResult(_DEPT_LIST_STRING)
 
-        @self.tool(description="List all available departments")
-        def list_departments() -> SwaigFunctionResult:
-            dept_list = [
-                f"{name.title()}: {info['description']}"
-                for name, info in self.DEPARTMENTS.items()
-            ]
-            return SwaigFunctionResult("Our departments: " + "; ".join(dept_list))
-
-        @self.tool(
-            description="Check if a department is currently available",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "department": {
-                        "type": "string",
-                        "description": "Department name"
-                    }
-                },
-                "required": ["department"]
-            }
-        )
-        def check_availability(department: str) -> SwaigFunctionResult:
-            department = department.lower()
-            is_open, message = self._is_department_open(department)
-
-            if is_open:
-                dept_info = self.DEPARTMENTS.get(department)
-                start, end = dept_info["hours"]
-                return SwaigFunctionResult(
-                    f"{department.title()} is open until {end}:00. "
-                    "Would you like me to transfer you?"
-                )
-            return SwaigFunctionResult(message)
-
-        @self.tool(
-            description="Transfer to a department",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "department": {
-                        "type": "string",
-                        "enum": list(self.DEPARTMENTS.keys()),
-                        "description": "Department to transfer to"
-                    }
-                },
-                "required": ["department"]
-            }
-        )
-        def transfer_to_department(department: str) -> SwaigFunctionResult:
-            department = department.lower()
+    @AgentBase.tool(
+        name="check_availability",
+        description="Check if a department is currently available",
+        parameters=_CHECK_AVAIL_SCHEMA
+    )
+    def check_availability(
+        self,
+        department: str,
+        raw_data: dict = None
+    ) -> SwaigFunctionResult:
+        department = _canonical_department(department)
+        now = _now_cached(raw_data)
+        is_open, message = self._is_department_open(department, now)
+
+        if is_open:
             dept_info = self.DEPARTMENTS.get(department)
+            start, end = dept_info["hours"]
+            return SwaigFunctionResult(
+                f"{department.title()} is open until {end}:00. "
+                "Would you like me to transfer you?"
+            )
+        return SwaigFunctionResult(message)
 
-            if not dept_info:
-                dept_list = ", ".join(self.DEPARTMENTS.keys())
-                return SwaigFunctionResult(
-                    f"Unknown department. Available: {dept_list}"
-                )
+    @AgentBase.tool(
+        name="transfer_to_department",
+        description="Transfer to a department",
+        parameters=_TRANSFER_SCHEMA
+    )
+    def transfer_to_department(
+        self,
+        department: str,
+        raw_data: dict = None
+    ) -> SwaigFunctionResult:
+        department = _canonical_department(department)
+        dept_info = department and self.DEPARTMENTS[department]
 
-            is_open, message = self._is_department_open(department)
+        if not dept_info:
+            dept_list = ", ".join(_DEPT_KEYS)
+            return SwaigFunctionResult(
+                f"Unknown department. Available: {dept_list}"
+            )
 
-            if not is_open:
-                return SwaigFunctionResult(
-                    f"I'm sorry, {message}. Would you like to leave a message "
-                    "or try a different department?"
-                )
+        is_open, message = self._is_department_open(
+            department, _now_cached(raw_data)
+        )
 
-            return (
-                SwaigFunctionResult(f"Connecting you to {department} now.")
-                .connect(dept_info["number"], final=True)
+        if not is_open:
+            return SwaigFunctionResult(
+                f"I'm sorry, {message}. Would you like to leave a message "
+                "or try a different department?"
             )
 
-        @self.tool(
-            description="Transfer with caller context",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "department": {
-                        "type": "string",
-                        "enum": list(self.DEPARTMENTS.keys()),
-                        "description": "Department to transfer to"
-                    },
-                    "reason": {
-                        "type": "string",
-                        "description": "Reason for calling"
-                    },
-                    "caller_name": {
-                        "type": "string",
-                        "description": "Caller's name"
-                    }
-                },
-                "required": ["department", "reason"]
-            }
+        return (
+            SwaigFunctionResult(f"Connecting you to {department} now.")
+            .connect(dept_info["number"], final=True)
         )
-        def transfer_with_context(
-            department: str,
-            reason: str,
-            caller_name: str = None,
-            raw_data: dict = None
-        ) -> SwaigFunctionResult:
-            department = department.lower()
-            is_open, message = self._is_department_open(department)
-
-            if not is_open:
-                return SwaigFunctionResult(
-                    f"Sorry, {message}. Would you like to leave a voicemail?"
-                )
 
-            dept_info = self.DEPARTMENTS[department]
-
-            # Store context for receiving agent
-            context = {
-                "transfer_reason": reason,
-                "caller_name": caller_name or "Unknown",
-                "transfer_time": datetime.now().isoformat(),
-                "from_receptionist": True
-            }
-
-            return (
-                SwaigFunctionResult(
-                    f"I'm transferring you to {department}. "
-                    f"I'll let them know about your {reason}.",
-                    post_process=True
-                )
-                .update_global_data(context)
-                .connect(dept_info["number"], final=True)
+    @AgentBase.tool(
+        name="transfer_with_context",
+        description="Transfer with caller context",
+        parameters=_CONTEXT_SCHEMA
+    )
+    def transfer_with_context(
+        self,
+        department: str,
+        reason: str,
+        caller_name: str = None,
+        raw_data: dict = None
+    ) -> SwaigFunctionResult:
+        department = _canonical_department(department)
+        now = _now_cached(raw_data)
+        is_open, message = self._is_department_open(department, now)
+
+        if not is_open:
+            return SwaigFunctionResult(
+                f"Sorry, {message}. Would you like to leave a voicemail?"
             )
 
-        @self.tool(
-            description="Leave a voicemail for a closed department",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "department": {
-                        "type": "string",
-                        "description": "Department name"
-                    },
-                    "message": {
-                        "type": "string",
-                        "description": "Message to leave"
-                    },
-                    "callback_number": {
-                        "type": "string",
-                        "description": "Number to call back"
-                    }
-                },
-                "required": ["department", "message"]
-            }
+        dept_info = self.DEPARTMENTS[department]
+
+        # Store context for receiving agent
+        context = _CONTEXT_TEMPLATE | {
+            "transfer_reason": reason,
+            "caller_name": caller_name or "Unknown",
+            "transfer_time": _iso_for_second(int(now.timestamp()))
+        }
+
+        return (
+            SwaigFunctionResult(
+                f"I'm transferring you to {department}. "
+                f"I'll let them know about your {reason}.",
+                post_process=True
+            )
+            .update_global_data(context)
+            .connect(dept_info["number"], final=True)
         )
-        def leave_voicemail(
-            department: str,
-            message: str,
-            callback_number: str = None
-        ) -> SwaigFunctionResult:
-            return (
-                SwaigFunctionResult(
-                    f"Your message for {department} has been recorded. "
-                    "They'll receive it when they open."
-                )
-                .update_global_data({
-                    "voicemail_department": department,
-                    "voicemail_message": message,
-                    "voicemail_callback": callback_number,
-                    "voicemail_time": datetime.now().isoformat()
-                })
+
+    @AgentBase.tool(
+        name="leave_voicemail",
+        description="Leave a voicemail for a closed department",
+        parameters=_VOICEMAIL_SCHEMA
+    )
+    def leave_voicemail(
+        self,
+        department: str,
+        message: str,
+        callback_number: str = None,
+        raw_data: dict = None
+    ) -> SwaigFunctionResult:
+        return (
+            SwaigFunctionResult(
+                f"Your message for {department} has been recorded. "
+                "They'll receive it when they open."
             )
+            .update_global_data(_VOICEMAIL_TEMPLATE | {
+                "voicemail_department": department,
+                "voicemail_message": message,
+                "voicemail_callback": callback_number,
+                "voicemail_time": _iso_for_second(
+                    int(_now_cached(raw_data).timestamp())
+                )
+            })
+        )
 
 
 if __name__ == "__main__":